@@ -0,0 +1,221 @@
+"""API HTTP asíncrona de predicción, independiente de la interfaz Streamlit.
+
+El preprocesador y el modelo se cargan al arrancar y se mantienen en caliente.
+Las peticiones concurrentes se agrupan en micro-lotes: durante una ventana
+corta (``--max-wait-ms``) se acumulan hasta ``--max-batch`` registros y se
+puntúan con una sola llamada a ``model.predict``.
+
+Uso:
+    python api.py --port 8000
+    python api.py --port 8000 --workers 4     # un proceso por núcleo
+
+    curl -X POST localhost:8000/predict -d '{"sleep_hours": 7.0, ...}'
+    curl -X POST localhost:8000/predict -d '{"instances": [{...}, {...}]}'
+    curl localhost:8000/metrics          # formato de texto de Prometheus
+    curl localhost:8000/metrics.json
+
+Las métricas son de cada proceso. Con ``--workers N`` cada worker lleva su
+propio registro y ``/metrics`` devuelve el del worker que atiende la
+petición, no el total. Para métricas completas, lance N procesos de un
+worker en puertos distintos detrás del balanceador y añada cada puerto como
+objetivo de Prometheus. ``/metrics.json`` incluye el ``pid`` del worker.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import os
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+from metrics import metrics
+from scoring import DEFAULT_INPUT, score_records, validate_record
+
+MAX_BATCH = int(os.environ.get("API_MAX_BATCH", "64"))
+MAX_WAIT_MS = float(os.environ.get("API_MAX_WAIT_MS", "2"))
+
+
+def _score(records):
+    return score_records(records, source='api')
+
+
+def _set_result(future, score):
+    if not future.done():
+        future.set_result(float(score))
+
+
+def _set_exception(future, exc):
+    if not future.done():
+        future.set_exception(exc)
+
+
+class MicroBatcher:
+    """Agrupa registros que llegan a la vez en una única llamada al modelo."""
+
+    def __init__(self, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS):
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = None
+        self._task = None
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, records):
+        """Encola los registros y espera a sus puntuaciones."""
+        loop = asyncio.get_running_loop()
+        futures = [loop.create_future() for _ in records]
+        for record, future in zip(records, futures):
+            self._queue.put_nowait((record, future))
+        return await asyncio.gather(*futures)
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_wait
+        while len(batch) < self.max_batch:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            records = [record for record, _ in batch]
+            try:
+                with metrics.stage('api_batch'):
+                    scores = await loop.run_in_executor(None, _score, records)
+            except Exception as e:
+                if len(batch) == 1:
+                    _set_exception(batch[0][1], e)
+                else:
+                    # El fallo de un registro no debe llegar al resto: se puntúan uno a uno.
+                    await self._score_each(batch)
+                continue
+            for (_, future), score in zip(batch, scores):
+                _set_result(future, score)
+
+    async def _score_each(self, batch):
+        loop = asyncio.get_running_loop()
+        for record, future in batch:
+            try:
+                scores = await loop.run_in_executor(None, _score, [record])
+            except Exception as e:
+                _set_exception(future, e)
+            else:
+                _set_result(future, scores[0])
+
+
+batcher = MicroBatcher()
+
+
+async def predict(request):
+    with metrics.stage('api_request'):
+        response = await _predict(request)
+    if response.status_code >= 400:
+        metrics.count_error('api_request')
+    return response
+
+
+async def _predict(request):
+    try:
+        payload = await request.json()
+    except ValueError:
+        return JSONResponse({"error": "El cuerpo debe ser JSON"}, status_code=400)
+
+    single = not (isinstance(payload, dict) and "instances" in payload)
+    records = [payload] if single else payload["instances"]
+    if not isinstance(records, list) or not records:
+        return JSONResponse({"error": "'instances' debe ser una lista no vacía"}, status_code=400)
+
+    problems = {i: p for i, p in enumerate(map(validate_record, records)) if p}
+    if problems:
+        return JSONResponse({"error": "Entrada no válida", "details": problems}, status_code=422)
+
+    try:
+        scores = await batcher.submit(records)
+    except Exception as e:
+        return JSONResponse({"error": f"Error durante la predicción: {e}"}, status_code=500)
+
+    if single:
+        return JSONResponse({"prediction": scores[0]})
+    return JSONResponse({"predictions": scores})
+
+
+async def health(request):
+    return JSONResponse({"status": "ok"})
+
+
+async def metrics_text(request):
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+async def metrics_json(request):
+    return JSONResponse(metrics.snapshot())
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    # Carga en caliente: una predicción de calentamiento deja en memoria los
+    # artefactos del motor configurado (INFERENCE_ENGINE).
+    score_records([DEFAULT_INPUT], source='warmup')
+    batcher.start()
+    yield
+    await batcher.stop()
+
+
+app = Starlette(
+    routes=[
+        Route("/predict", predict, methods=["POST"]),
+        Route("/health", health, methods=["GET"]),
+        Route("/metrics", metrics_text, methods=["GET"]),
+        Route("/metrics.json", metrics_json, methods=["GET"]),
+    ],
+    lifespan=lifespan,
+)
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="API HTTP de predicción de productividad")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Procesos independientes, cada uno con su modelo en caliente "
+                             "(y sus propias métricas)")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH, help="Registros máximos por micro-lote")
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS,
+                        help="Espera máxima para completar un micro-lote")
+    args = parser.parse_args(argv)
+
+    # Los workers de uvicorn importan api.py de nuevo: la configuración va por entorno.
+    os.environ["API_MAX_BATCH"] = str(args.max_batch)
+    os.environ["API_MAX_WAIT_MS"] = str(args.max_wait_ms)
+    batcher.max_batch = args.max_batch
+    batcher.max_wait = args.max_wait_ms / 1000
+
+    if args.workers > 1:
+        uvicorn.run("api:app", host=args.host, port=args.port, workers=args.workers, log_level="warning")
+    else:
+        uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
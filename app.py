@@ -1,11 +1,23 @@
+import os
+import time
+
 import streamlit as st
 import pandas as pd
-import joblib
-import numpy as np
 
-# --- Cargar artefactos del modelo ---
-preprocessor = joblib.load('preprocessor.pkl')
-model = joblib.load('final_productivity_model.pkl')
+from artifacts import registry
+from attribution import get_explainer
+from metrics import metrics, serve_metrics
+from prediction_cache import cache_stats, cached_score, prediction_cache
+from scoring import CATEGORY_OPTIONS, DEFAULT_ENGINE, ENGINES, FEATURE_LABELS, rule_adjustment, score_frame
+from sensitivity import recommendations, sensitivity
+
+# --- Artefactos del modelo ---
+# Se cargan de forma perezosa en la primera predicción (solo los del motor
+# elegido) y el registro de artifacts.py los mantiene entre reruns y sesiones.
+
+# --- Métricas ---
+# Con METRICS_PORT definido, /metrics y /metrics.json de este proceso (una vez por proceso).
+serve_metrics()
 
 # --- Título ---
 st.title("🚀 POC: Sistema de Predicción de Productividad Laboral")
@@ -18,10 +30,9 @@ with st.expander("📌 ¿Cómo funciona este modelo?", expanded=True):
     st.write("""
     Este modelo predictivo utiliza 19 variables de entrada (desde horas de sueño hasta uso de redes sociales) 
     para estimar el *actual_productivity_score* (0-10) con un *error promedio del 11.65% (MAPE)*.  
-    🔍 *Hallazgos clave:*  
-    - Variables críticas: Satisfacción laboral (20.3%), Horas de sueño (18.7%), Estrés (15.2%).  
-    - Hábitos digitales explican solo el 9.8% del impacto.  
-    """)# Añade tu gráfico de importancia aquí
+    🔍 *Factores de cada predicción:* el peso de cada variable se calcula para su caso concreto
+    (valores SHAP exactos sobre los árboles del modelo) y se muestra junto al resultado.  
+    """)
 
 # --- Entradas del usuario ---
 st.sidebar.header("⚙️ Configuración de Entradas")
@@ -30,9 +41,9 @@ def user_input():
     def clamp(val, min_val, max_val):
         return max(min(val, max_val), min_val)
 
-    gender = st.sidebar.selectbox("Género", ["Male", "Female", "Other"])
-    job_type = st.sidebar.selectbox("Tipo de trabajo", ["IT", "Health", "Finance", "Student", "Unemployed"])
-    platform = st.sidebar.selectbox("Red social preferida", ["Instagram", "TikTok", "Other"])
+    gender = st.sidebar.selectbox("Género", CATEGORY_OPTIONS['gender'])
+    job_type = st.sidebar.selectbox("Tipo de trabajo", CATEGORY_OPTIONS['job_type'])
+    platform = st.sidebar.selectbox("Red social preferida", CATEGORY_OPTIONS['social_platform_preference'])
     uses_focus_apps = st.sidebar.radio("¿Usa apps de enfoque?", ["Sí", "No"])
     has_digital_wellbeing_enabled = st.sidebar.radio("¿Bienestar digital activado?", ["Sí", "No"])
 
@@ -57,51 +68,66 @@ def user_input():
 
     return pd.DataFrame([data])
 
+def show_cache_stats(panel):
+    stats = cache_stats()
+    panel.caption(
+        f"Entradas: {stats['size']}/{stats['maxsize']} · TTL: {stats['ttl']:.0f}s  \n"
+        f"Aciertos: {stats['hits']} · Fallos: {stats['misses']} · Tasa: {stats['hit_rate']:.1%}  \n"
+        f"Desalojos: {stats['evictions']} · Caducadas: {stats['expirations']}  \n"
+        f"Tabla precalculada: {'activa' if stats['lookup_enabled'] else 'inactiva'}"
+        f" ({stats['lookup_size']} puntos, {stats['lookup_hits']} aciertos)"
+    )
+
 # --- Recoger input y validarlo ---
 df_input = user_input()
 
+with st.sidebar.expander("🛠️ Avanzado"):
+    engine = st.selectbox("Motor de inferencia", ENGINES, index=ENGINES.index(DEFAULT_ENGINE),
+                          help="'compiled' evalúa el pipeline exportado con NumPy, sin pandas ni sklearn")
+
+    st.markdown("*Caché de predicciones*")
+    # Se rellena tras la predicción, para que los contadores incluyan la de este rerun.
+    cache_panel = st.empty()
+    if st.button("Vaciar caché"):
+        prediction_cache.clear()
+
+    if os.environ.get("STARTUP_PROFILE", "0") == "1":
+        st.markdown("*Perfil de arranque*")
+        st.caption("  \n".join(
+            f"{name}: {entry['load_seconds'] * 1000:.0f} ms (cargas: {entry['loads']})"
+            for name, entry in registry.info().items()
+        ) or "Ningún artefacto cargado todavía.")
+        if st.button("Medir arranque en frío"):
+            from startup_profile import startup_profile
+            with st.spinner("Midiendo en procesos nuevos…"):
+                profile = startup_profile()
+            st.write(pd.DataFrame({
+                "ms": {f"import {m}": t * 1000 for m, t in profile["imports"].items()}
+                | {f"import {m}": None if t is None else t * 1000 for m, t in profile["optional_imports"].items()}
+                | {f"carga {a}": None if t is None else t * 1000 for a, t in profile["artifacts"].items()}
+            }))
+
 # --- Mostrar los datos ---
 st.subheader("📥 Datos procesados")
 st.write(df_input)
 
 # --- Preparar input para predicción ---
 try:
-    expected_cols = preprocessor.feature_names_in_
-    for col in expected_cols:
-        if col not in df_input.columns:
-            df_input[col] = np.nan
-
-    X_proc = preprocessor.transform(df_input[expected_cols])
-    pred = model.predict(X_proc)
-
-    # --- Ajuste manual basado en reglas lógicas ---
-    adjustment = 0
-
-    if df_input['sleep_hours'].iloc[0] >= 8:
-        adjustment += 0.5
-
-    if df_input['stress_level'].iloc[0] >= 8:
-        adjustment -= 0.7
-
-    if df_input['screen_time_before_sleep'].iloc[0] >= 3:
-        adjustment -= 0.4
-
-    if df_input['uses_focus_apps'].iloc[0] == 1:
-        adjustment += 0.3
-        # Ajuste por horas de trabajo
-    if df_input['work_hours_per_day'].iloc[0] >= 7:
-        adjustment += 0.4
-    elif df_input['work_hours_per_day'].iloc[0] <= 5:
-        adjustment -= 0.5
-
-
-    # Aplicar el ajuste y limitar entre 0 y 10
-    pred_adjusted = np.clip(pred[0] + adjustment, 0, 10)
+    # Ajuste manual basado en reglas lógicas y límite entre 0 y 10 en scoring.py
+    with metrics.stage('app_prediction'):
+        pred_adjusted = cached_score(
+            df_input.iloc[0].to_dict(),
+            lambda: score_frame(df_input, engine=engine)[0],
+            score_fn=lambda df: score_frame(df, engine=engine, source='lookup'),
+        )
 
 except Exception as e:
+    show_cache_stats(cache_panel)
     st.error(f"❌ Error durante la predicción: {e}")
     st.stop()
 
+show_cache_stats(cache_panel)
+
 # --- Interpretación ---
 nivel = "Alta" if pred_adjusted >= 7.5 else ("Media" if pred_adjusted >= 5 else "Baja")
 
@@ -116,25 +142,79 @@ with col2:
 st.progress(min(pred_adjusted/10, 1.0))
 st.caption(f"*Interpretación:* {nivel} productividad ({'Se recomiendan intervenciones' if pred_adjusted<5 else 'Rendimiento adecuado' if pred_adjusted<7.5 else 'Desempeño óptimo'})")
 
+# --- Atribución por variable ---
+st.subheader("🔍 Factores de esta Predicción")
+try:
+    with metrics.stage('attribution'):
+        explainer = get_explainer()
+        phi = explainer.explain_frame(df_input)
+    contributions = pd.Series(
+        {FEATURE_LABELS[f]: phi[f'shap_{f}'].iloc[0] for f in explainer.feature_names}
+    )
+    contributions["Ajuste por reglas"] = rule_adjustment(df_input)[0]
+    contributions = contributions.reindex(contributions.abs().sort_values(ascending=False).index)
+    st.bar_chart(contributions.rename("Contribución (puntos)"), horizontal=True)
+    st.caption(
+        f"*Punto de partida:* {explainer.expected_value:.2f} (predicción media del modelo). "
+        "Cada barra suma o resta puntos hasta llegar a la productividad predicha (limitada a 0-10)."
+    )
+except Exception as e:
+    st.warning(f"⚠️ No se pudieron calcular las atribuciones: {e}")
+
 # --- Recomendaciones ---
+# Curvas de respuesta de cada variable numérica, puntuadas en un solo lote.
+record = df_input.iloc[0].to_dict()
+sweep_start = time.perf_counter()
+with metrics.stage('sensitivity'):
+    curves = sensitivity(record, score_fn=lambda df: score_frame(df, engine=engine, source='sweep'))
+    recs = recommendations(curves, record, pred_adjusted)
+sweep_ms = (time.perf_counter() - sweep_start) * 1000
+
 st.subheader("🎯 Recomendaciones Personalizadas")
-if pred_adjusted < 5:
+lines = "\n".join(
+    f"- {r['label']}: de {r['current']:g} a {r['target']:g} (+{r['gain']:.2f} puntos).  "
+    for r in recs
+)
+if not recs:
+    st.success("✅ *Rendimiento óptimo:* ningún cambio de hábitos razonable mejora la predicción. Mantenga sus hábitos actuales.")
+elif pred_adjusted < 5:
     st.warning(f"""
 ⚠️ *Acciones prioritarias:*  
-- Mejorar satisfacción laboral (actual: {df_input['job_satisfaction_score'].iloc[0]:.1f}/10).  
-- Aumentar horas de sueño (actual: {df_input['sleep_hours'].iloc[0]:.1f}h).  
-- Reducir estrés (actual: {df_input['stress_level'].iloc[0]:.1f}/10).  
-- Limitar redes sociales (actual: {df_input['social_media_log'].iloc[0]:.1f} log-horas).  
+{lines}
 """)
 elif pred_adjusted < 7.5:
     st.info(f"""
 ℹ️ *Oportunidades de mejora:*  
-- Optimizar pausas laborales (actuales: {df_input['breaks_during_work'].iloc[0]} por día).  
-- Reducir pantallas antes de dormir (actual: {df_input['screen_time_before_sleep'].iloc[0]:.1f}h).  
-- Monitorear días de burnout (actuales: {df_input['days_feeling_burnout_per_month'].iloc[0]} mensuales).  
+{lines}
 """)
 else:
-    st.success("✅ *Rendimiento óptimo:* Mantenga sus hábitos actuales.")
+    st.success(f"""
+✅ *Rendimiento óptimo.* Ajustes con mayor ganancia:  
+{lines}
+""")
+
+with st.expander("📈 Explorador de sensibilidad"):
+    st.caption(f"Productividad predicha al variar cada factor, con el resto fijo ({sweep_ms:.0f} ms).")
+    # Un solo gráfico facetado: 12 gráficos de Altair por separado tardan más de un segundo en generarse.
+    curves_long = pd.concat(
+        [curve.assign(factor=f"{FEATURE_LABELS[feature]} (actual: {record[feature]:g})")
+         for feature, curve in curves.items()],
+        ignore_index=True,
+    )
+    st.vega_lite_chart(curves_long, {
+        "facet": {"field": "factor", "type": "nominal", "title": None, "sort": None},
+        "columns": 3,
+        "spec": {
+            "width": 180,
+            "height": 110,
+            "mark": {"type": "line", "point": True},
+            "encoding": {
+                "x": {"field": "value", "type": "quantitative", "title": None},
+                "y": {"field": "score", "type": "quantitative", "title": "Productividad"},
+            },
+        },
+        "resolve": {"scale": {"x": "independent"}},
+    })
 
 # --- Pie de página ---
 st.markdown("---")
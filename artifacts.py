@@ -0,0 +1,133 @@
+"""Registro de artefactos del modelo compartido por todo el proceso.
+
+Streamlit re-ejecuta ``app.py`` en cada interacción, pero los módulos
+importados se conservan en ``sys.modules``. El registro vive aquí para que
+los pickles se carguen una sola vez por proceso (y por versión del fichero),
+no una vez por rerun o por sesión.
+"""
+
+import hashlib
+import os
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# --- Configuración ---
+# ARTIFACT_MMAP=1 carga los arrays de numpy de los pickles con memory-mapping
+# (joblib mmap_mode='r'): varias réplicas del proceso comparten las páginas.
+# ARTIFACT_VERIFY_HASH=1 compara además el SHA-256 del fichero, no solo mtime/tamaño.
+MMAP_ENABLED = os.environ.get("ARTIFACT_MMAP", "0") == "1"
+VERIFY_HASH = os.environ.get("ARTIFACT_VERIFY_HASH", "0") == "1"
+
+
+def _file_hash(*paths):
+    h = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    return h.hexdigest()
+
+
+def _joblib_loader(path, mmap):
+    # Import diferido: joblib (y sklearn al deserializar) solo hacen falta con el motor 'sklearn'.
+    import joblib
+    return joblib.load(path, mmap_mode="r" if mmap else None)
+
+
+def _compiled_loader(path, mmap):
+    # Import diferido: compiled.py depende de scoring.py, que depende de este módulo.
+    from compiled import load_compiled
+    return load_compiled(path)
+
+
+class ArtifactRegistry:
+    """Carga perezosa de artefactos con invalidación por mtime/tamaño o hash."""
+
+    def __init__(self, mmap=MMAP_ENABLED, verify_hash=VERIFY_HASH):
+        self.mmap = mmap
+        self.verify_hash = verify_hash
+        self._specs = {}
+        self._entries = {}
+        self._lock = threading.RLock()
+
+    def register(self, name, path, loader=_joblib_loader, depends=()):
+        """``depends``: artefactos registrados cuyos ficheros también invalidan esta entrada."""
+        if not os.path.isabs(path):
+            path = os.path.join(BASE_DIR, path)
+        with self._lock:
+            self._specs[name] = (path, loader, tuple(depends))
+            self._entries.pop(name, None)
+
+    def path(self, name):
+        return self._specs[name][0]
+
+    def _fingerprint(self, path):
+        st = os.stat(path)
+        fingerprint = (st.st_mtime_ns, st.st_size)
+        if self.verify_hash:
+            fingerprint += (_file_hash(path),)
+        return fingerprint
+
+    def _entry_fingerprint(self, name):
+        path, _, depends = self._specs[name]
+        fingerprint = [self._fingerprint(path)]
+        for dep in depends:
+            dep_path = self._specs[dep][0]
+            fingerprint.append(self._fingerprint(dep_path) if os.path.exists(dep_path) else None)
+        return tuple(fingerprint)
+
+    def get(self, name):
+        with self._lock:
+            if name not in self._specs:
+                raise KeyError(f"Artefacto no registrado: {name}")
+            path, loader, _ = self._specs[name]
+            fingerprint = self._entry_fingerprint(name)
+            entry = self._entries.get(name)
+            if entry is None or entry["fingerprint"] != fingerprint:
+                start = time.perf_counter()
+                obj = loader(path, self.mmap)
+                self._entries[name] = {
+                    "object": obj,
+                    "fingerprint": fingerprint,
+                    "load_seconds": time.perf_counter() - start,
+                    "loaded_at": time.time(),
+                    "loads": (entry["loads"] + 1) if entry else 1,
+                }
+            return self._entries[name]["object"]
+
+    def invalidate(self, name=None):
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(name, None)
+
+    def info(self):
+        with self._lock:
+            return {
+                name: {k: v for k, v in entry.items() if k != "object"}
+                for name, entry in self._entries.items()
+            }
+
+
+# --- Registro por defecto del proceso ---
+registry = ArtifactRegistry()
+registry.register("preprocessor", "preprocessor.pkl")
+registry.register("model", "final_productivity_model.pkl")
+# El export se valida contra los pickles de origen al cargarlo: si estos cambian,
+# la entrada se recarga (y falla si el export no se ha regenerado).
+registry.register("compiled", "compiled_model.npz", loader=_compiled_loader, depends=("preprocessor", "model"))
+
+
+def get_preprocessor():
+    return registry.get("preprocessor")
+
+
+def get_model():
+    return registry.get("model")
+
+
+def get_compiled():
+    return registry.get("compiled")
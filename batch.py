@@ -0,0 +1,267 @@
+"""Puntuación masiva de ficheros CSV (exportaciones de RR. HH.).
+
+El CSV se lee por chunks; cada chunk pasa una sola vez por el preprocesador
+y el modelo, y el resultado se escribe de forma incremental, de modo que la
+memoria depende del tamaño del chunk y no del fichero.
+
+Las filas con valores vacíos o no numéricos no detienen el proceso: se
+escriben sin puntuación y con el motivo en la columna ``scoring_error``. La
+salida se escribe en un fichero temporal que solo se renombra al terminar,
+así que un fallo nunca deja un resultado a medias.
+
+Uso:
+    python batch.py empleados.csv resultados.csv
+    python batch.py empleados.csv resultados.parquet --chunksize 20000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from artifacts import get_model, get_preprocessor
+from scoring import BATCH_ENGINE, CATEGORICAL_FEATURES, ENGINES, FEATURES, NUMERIC_RANGES, clamp_frame, score_parts
+
+DEFAULT_CHUNKSIZE = 10_000
+OUTPUT_COLUMNS = ['predicted_raw', 'rule_adjustment', 'predicted_productivity']
+ERROR_COLUMN = 'scoring_error'
+# Tipos fijos de las columnas conocidas en la salida Parquet: no dependen de
+# lo que traiga el primer chunk (un 2.5 en una columna entera o una columna
+# categórica vacía romperían un esquema inferido).
+OUTPUT_TYPES = {
+    **{col: 'float64' for col in NUMERIC_RANGES},
+    **{col: 'string' for col in CATEGORICAL_FEATURES},
+    **{col: 'float64' for col in OUTPUT_COLUMNS},
+    ERROR_COLUMN: 'string',
+}
+
+
+def invalid_reasons(clean):
+    """Motivo por el que no se puede puntuar cada fila ya limpiada ('' si es válida)."""
+    reasons = pd.Series('', index=clean.index, dtype=object)
+    for col in FEATURES:
+        reason = f"'{col}' no es numérico" if col in NUMERIC_RANGES else f"'{col}' está vacío"
+        bad = clean[col].isna()
+        if bad.any():
+            sep = np.where(reasons == '', '', '; ')
+            reasons = reasons.mask(bad, reasons + sep + reason)
+    return reasons
+
+
+def prepare_chunk(chunk):
+    """Limpia un chunk y devuelve ``(clean, errors, out)``.
+
+    ``clean`` es la entrada limitada a los rangos, ``errors`` el motivo por
+    fila de que no se pueda puntuar ('' si es válida) y ``out`` la copia que
+    se escribe, con las columnas numéricas ya convertidas (vacías si no se
+    pudieron leer).
+    """
+    missing = [col for col in FEATURES if col not in chunk.columns]
+    if missing:
+        raise ValueError(f"Faltan columnas en el CSV: {', '.join(missing)}")
+    clean = clamp_frame(chunk)
+    out = chunk.copy()
+    for col in NUMERIC_RANGES:
+        out[col] = pd.to_numeric(chunk[col], errors='coerce')
+    return clean, invalid_reasons(clean), out
+
+
+def score_chunk(chunk, preprocessor=None, model=None, engine=None):
+    """Añade al chunk la predicción del modelo, el ajuste, la puntuación final y el motivo de error.
+
+    Las filas no válidas quedan con las columnas de salida vacías.
+    """
+    clean, errors, out = prepare_chunk(chunk)
+    valid = (errors == '').to_numpy()
+
+    raw = np.full(len(chunk), np.nan)
+    adjustment = np.full(len(chunk), np.nan)
+    scores = np.full(len(chunk), np.nan)
+    if valid.any():
+        raw[valid], adjustment[valid], scores[valid] = score_parts(clean[valid], preprocessor, model, engine,
+                                                                   source='batch')
+
+    out['predicted_raw'] = raw
+    out['rule_adjustment'] = adjustment
+    out['predicted_productivity'] = scores
+    out[ERROR_COLUMN] = errors
+    return out
+
+
+class _Sink:
+    """Escribe en ``dst.part`` y lo renombra a ``dst`` al cerrar; ``discard()`` lo borra."""
+
+    def __init__(self, dst):
+        self.dst = dst
+        self.tmp = f"{dst}.part"
+
+    def _finish(self):
+        pass
+
+    def close(self):
+        self._finish()
+        if os.path.exists(self.tmp):
+            os.replace(self.tmp, self.dst)
+
+    def discard(self):
+        try:
+            self._finish()
+        finally:
+            if os.path.exists(self.tmp):
+                os.remove(self.tmp)
+
+
+class _CsvSink(_Sink):
+    def __init__(self, dst):
+        super().__init__(dst)
+        self.header = True
+
+    def write(self, frame):
+        frame.to_csv(self.tmp, mode='w' if self.header else 'a', header=self.header, index=False)
+        self.header = False
+
+
+class _ParquetSink(_Sink):
+    def __init__(self, dst, types=None):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("La salida Parquet requiere pyarrow (pip install pyarrow)") from e
+        super().__init__(dst)
+        self.pa, self.pq = pa, pq
+        self.types = types or {}
+        self.writer = None
+        self.schema = None
+
+    def _schema(self, inferred):
+        """Esquema de la salida: tipos fijos de ``types`` y, para el resto, los del primer chunk."""
+        fields = []
+        for field in inferred:
+            if field.name in self.types:
+                field = field.with_type(self.pa.type_for_alias(self.types[field.name]))
+            elif self.pa.types.is_null(field.type):
+                field = field.with_type(self.pa.string())
+            fields.append(field)
+        return self.pa.schema(fields)
+
+    def write(self, frame):
+        table = self.pa.Table.from_pandas(frame, preserve_index=False)
+        if self.writer is None:
+            self.schema = self._schema(table.schema)
+            self.writer = self.pq.ParquetWriter(self.tmp, self.schema)
+        self.writer.write_table(table.cast(self.schema))
+
+    def _finish(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+def open_sink(dst, fmt=None, types=None):
+    """Salida incremental en CSV o Parquet; ``types`` fija el tipo Parquet de algunas columnas."""
+    if fmt is None:
+        fmt = 'parquet' if str(dst).lower().endswith(('.parquet', '.pq')) else 'csv'
+    if fmt == 'parquet':
+        return _ParquetSink(dst, types)
+    if fmt == 'csv':
+        return _CsvSink(dst)
+    raise ValueError(f"Formato de salida no soportado: {fmt}")
+
+
+class ScoreSummary:
+    """Recuento, media, desviación, mínimo y máximo de las columnas de salida, acumulados por chunk."""
+
+    def __init__(self, columns=OUTPUT_COLUMNS):
+        self.columns = list(columns)
+        n = len(self.columns)
+        self.count = np.zeros(n)
+        self.sum = np.zeros(n)
+        self.sumsq = np.zeros(n)
+        self.min = np.full(n, np.inf)
+        self.max = np.full(n, -np.inf)
+
+    def update(self, frame):
+        values = frame[self.columns].to_numpy(dtype=float)
+        values = values[~np.isnan(values).any(axis=1)]
+        if len(values):
+            self.count += len(values)
+            self.sum += values.sum(axis=0)
+            self.sumsq += (values ** 2).sum(axis=0)
+            self.min = np.minimum(self.min, values.min(axis=0))
+            self.max = np.maximum(self.max, values.max(axis=0))
+
+    def to_frame(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = self.sum / self.count
+            var = np.maximum(self.sumsq - self.count * mean ** 2, 0.0) / (self.count - 1)
+        return pd.DataFrame({
+            'count': self.count,
+            'mean': mean,
+            'std': np.sqrt(var),
+            'min': np.where(self.count > 0, self.min, np.nan),
+            'max': np.where(self.count > 0, self.max, np.nan),
+        }, index=self.columns).T
+
+
+def score_csv(src, dst, chunksize=DEFAULT_CHUNKSIZE, fmt=None, on_chunk=None, engine=None):
+    """Puntúa ``src`` por chunks y escribe el resultado en ``dst`` (CSV o Parquet).
+
+    ``src`` puede ser una ruta o un objeto fichero. ``on_chunk(rows_done)``
+    se llama después de cada chunk para informar del progreso.
+    Devuelve un dict con las filas leídas (``rows``), las no válidas
+    (``invalid``) y el resumen de las puntuaciones de todo el fichero
+    (``summary``, un ``ScoreSummary``).
+    """
+    engine = engine or BATCH_ENGINE
+    preprocessor = get_preprocessor() if engine == 'sklearn' else None
+    model = get_model() if engine == 'sklearn' else None
+    sink = open_sink(dst, fmt, OUTPUT_TYPES)
+    summary = ScoreSummary()
+    rows = invalid = 0
+    try:
+        # Todo se lee como texto: las columnas ajenas al modelo (identificadores...)
+        # se copian tal cual y las numéricas se convierten en score_chunk.
+        for chunk in pd.read_csv(src, chunksize=chunksize, dtype=str):
+            out = score_chunk(chunk, preprocessor, model, engine)
+            sink.write(out)
+            summary.update(out)
+            rows += len(chunk)
+            invalid += int((out[ERROR_COLUMN] != '').sum())
+            if on_chunk is not None:
+                on_chunk(rows)
+    except BaseException:
+        sink.discard()
+        raise
+    sink.close()
+    return {'rows': rows, 'invalid': invalid, 'summary': summary}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Puntuación masiva de productividad desde un CSV")
+    parser.add_argument('input', help="CSV de entrada con las columnas de user_input()")
+    parser.add_argument('output', help="Fichero de salida (.csv o .parquet)")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help="Filas por chunk")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default=None,
+                        help="Formato de salida (por defecto se deduce de la extensión)")
+    parser.add_argument('--engine', choices=ENGINES, default=BATCH_ENGINE, help="Motor de inferencia")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.input):
+        parser.error(f"No existe el fichero de entrada: {args.input}")
+
+    start = time.perf_counter()
+    result = score_csv(args.input, args.output, chunksize=args.chunksize, fmt=args.format, engine=args.engine)
+    elapsed = time.perf_counter() - start
+    rows = result['rows']
+    print(f"{rows - result['invalid']} de {rows} filas puntuadas en {elapsed:.2f}s ({rows / max(elapsed, 1e-9):,.0f} filas/s) -> {args.output}")
+    if result['invalid']:
+        print(f"⚠️ {result['invalid']} filas no válidas sin puntuar (ver columna '{ERROR_COLUMN}')")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""Benchmark de arranque en frío con presupuesto para detectar regresiones.
+
+Cada escenario se ejecuta varias veces en un intérprete nuevo y se toma la
+mediana del tiempo hasta la primera predicción:
+
+    compiled  import de scoring + primera predicción con el motor 'compiled'
+    sklearn   import de scoring + primera predicción con el motor 'sklearn'
+    app       imports de la app (incluido streamlit) + primera predicción
+              con el motor por defecto + explicador SHAP
+
+Las medianas se comparan con ``startup_budget.json``; si alguna supera su
+presupuesto el script termina con código 1.
+
+Uso:
+    python bench_startup.py
+    python bench_startup.py --runs 10 --update-budget
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BUDGET_PATH = os.path.join(BASE_DIR, 'startup_budget.json')
+# Margen sobre la mediana medida al regenerar el presupuesto con --update-budget.
+BUDGET_HEADROOM = 1.5
+
+SCENARIOS = {
+    'compiled': (
+        "import scoring\n"
+        "scoring.score_records([scoring.DEFAULT_INPUT], engine='compiled')\n"
+    ),
+    'sklearn': (
+        "import scoring\n"
+        "scoring.score_records([scoring.DEFAULT_INPUT], engine='sklearn')\n"
+    ),
+    'app': (
+        "import streamlit, attribution, prediction_cache, sensitivity, scoring\n"
+        "scoring.score_records([scoring.DEFAULT_INPUT])\n"
+        "attribution.get_explainer()\n"
+    ),
+}
+
+
+def measure(code, runs):
+    """Tiempos (s) de ``runs`` ejecuciones en frío, desde el arranque del intérprete."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-W', 'ignore', '-c', code],
+                                cwd=BASE_DIR, capture_output=True, text=True)
+        elapsed = time.perf_counter() - start
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1])
+        times.append(elapsed)
+    return times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de arranque en frío")
+    parser.add_argument('--runs', type=int, default=5, help="Ejecuciones por escenario")
+    parser.add_argument('--scenario', choices=list(SCENARIOS), action='append',
+                        help="Escenarios a medir (por defecto, todos)")
+    parser.add_argument('--update-budget', action='store_true',
+                        help=f"Reescribe el presupuesto con la mediana x{BUDGET_HEADROOM}")
+    args = parser.parse_args(argv)
+
+    budget = {}
+    if os.path.exists(BUDGET_PATH):
+        with open(BUDGET_PATH) as f:
+            budget = json.load(f)
+
+    results, failed = {}, []
+    for name in args.scenario or SCENARIOS:
+        times = measure(SCENARIOS[name], args.runs)
+        median = statistics.median(times)
+        results[name] = median
+        limit = budget.get(name)
+        status = "" if limit is None else ("OK" if median <= limit else "REGRESIÓN")
+        if status == "REGRESIÓN":
+            failed.append(name)
+        limit_txt = "-" if limit is None else f"{limit:.2f}s"
+        print(f"{name:<10} mediana={median:.3f}s  min={min(times):.3f}s  presupuesto={limit_txt}  {status}")
+
+    if args.update_budget:
+        budget.update({name: round(t * BUDGET_HEADROOM, 2) for name, t in results.items()})
+        with open(BUDGET_PATH, 'w') as f:
+            json.dump(budget, f, indent=2)
+            f.write("\n")
+        print(f"Presupuesto actualizado en {BUDGET_PATH}")
+        return 0
+
+    if failed:
+        print(f"❌ Arranque por encima del presupuesto: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
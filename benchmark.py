@@ -0,0 +1,208 @@
+"""Benchmark offline y regresión de exactitud del pipeline de puntuación.
+
+    speed     throughput y memoria pico de la puntuación fila a fila frente
+              a la puntuación por lotes, para cada motor de inferencia y
+              tamaños de 1 a 1M filas de entradas sintéticas.
+    golden    compara las puntuaciones (modelo + ajuste por reglas + límite
+              0-10) de cada motor, por lotes y fila a fila, con las salidas
+              de referencia de ``golden_predictions.csv``.
+    accuracy  R², RMSE y MAPE sobre un CSV etiquetado, para contrastar las
+              cifras del pie de página de la app.
+
+Uso:
+    python benchmark.py speed --sizes 1,100,10000,1000000
+    python benchmark.py golden               # --update regenera la referencia
+    python benchmark.py accuracy datos.csv --target actual_productivity_score
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from scoring import (BATCH_ENGINE, ENGINES, FEATURES, clamp_frame, predict_raw, random_inputs, rule_adjustment,
+                     score_frame)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+GOLDEN_PATH = os.path.join(BASE_DIR, 'golden_predictions.csv')
+
+DEFAULT_SIZES = [1, 100, 10_000, 1_000_000]
+# La puntuación fila a fila se limita a este número de filas por medida.
+MAX_SINGLE_ROWS = 1000
+GOLDEN_ROWS = 2000
+GOLDEN_TOLERANCE = 1e-9
+GOLDEN_COLUMNS = ['predicted_raw', 'rule_adjustment', 'predicted_productivity']
+
+
+def synthetic_inputs(n, seed=0):
+    """Entradas aleatorias con los rangos y pasos (0.01) de los widgets de user_input()."""
+    return random_inputs(n, seed, decimals=2)
+
+
+# --- Velocidad y memoria ---
+
+def _single_row(df, engine):
+    for i in range(len(df)):
+        score_frame(df.iloc[[i]], engine=engine)
+
+
+def _batched(df, engine):
+    score_frame(df, engine=engine)
+
+
+def _measure(fn, df, engine):
+    fn(df.iloc[:1], engine)  # calentamiento: carga de artefactos fuera de la medida
+    start = time.perf_counter()
+    fn(df, engine)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    fn(df, engine)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def run_speed(sizes=DEFAULT_SIZES, engines=ENGINES, seed=0):
+    results = []
+    for size in sizes:
+        df = synthetic_inputs(size, seed)
+        for engine in engines:
+            for mode, fn in (('single', _single_row), ('batch', _batched)):
+                rows = df if mode == 'batch' else df.iloc[:MAX_SINGLE_ROWS]
+                elapsed, peak = _measure(fn, rows, engine)
+                results.append({
+                    'size': size,
+                    'engine': engine,
+                    'mode': mode,
+                    'rows': len(rows),
+                    'seconds': elapsed,
+                    'rows_per_second': len(rows) / elapsed,
+                    'peak_mb': peak / 2**20,
+                })
+                r = results[-1]
+                print(f"{size:>9} {engine:<9} {mode:<7} {r['rows']:>9} filas  "
+                      f"{r['rows_per_second']:>12,.0f} filas/s  pico {r['peak_mb']:8.1f} MB")
+    return results
+
+
+# --- Salidas de referencia ---
+
+def golden_inputs(seed=0):
+    """Entradas de referencia: aleatorias, umbrales exactos de las reglas y casos que se recortan a 0-10."""
+    df = synthetic_inputs(GOLDEN_ROWS, seed)
+
+    # Umbrales de las reglas (>=8, >=3, >=7, <=5) y sus vecinos inmediatos.
+    edges = synthetic_inputs(24, seed + 1)
+    edges['sleep_hours'] = np.resize([7.99, 8.0, 8.01], 24)
+    edges['stress_level'] = np.resize([8.0, 7.99, 8.01, 1.0], 24)
+    edges['screen_time_before_sleep'] = np.resize([3.0, 2.99], 24)
+    edges['work_hours_per_day'] = np.resize([7.0, 6.99, 5.0, 5.01, 0.0, 16.0], 24)
+    edges['uses_focus_apps'] = np.resize([0, 1], 24)
+
+    # Filas cuya puntuación sin recortar cae fuera de 0-10.
+    pool = synthetic_inputs(200_000, seed + 2)
+    unclipped = predict_raw(pool, engine='sklearn') + rule_adjustment(pool)
+    clipped = pool[(unclipped > 10) | (unclipped < 0)]
+
+    return pd.concat([df, edges, clipped], ignore_index=True)
+
+
+def golden_outputs(df, engine):
+    clean = clamp_frame(df)
+    raw = predict_raw(clean, engine=engine)
+    adjustment = rule_adjustment(clean)
+    return pd.DataFrame({
+        'predicted_raw': raw,
+        'rule_adjustment': adjustment,
+        'predicted_productivity': score_frame(clean, engine=engine),
+    }, index=df.index)
+
+
+def update_golden(path=GOLDEN_PATH):
+    # La referencia se genera con el pipeline original de sklearn.
+    df = golden_inputs()
+    out = pd.concat([df, golden_outputs(df, 'sklearn')], axis=1)
+    out.to_csv(path, index=False, float_format='%.17g')
+    print(f"✅ {len(out)} filas de referencia guardadas en {path}")
+
+
+def check_golden(path=GOLDEN_PATH, engines=ENGINES):
+    golden = pd.read_csv(path)
+    inputs = golden[FEATURES]
+    ok = True
+    for engine in engines:
+        batch = golden_outputs(inputs, engine)
+        # Fila a fila, como la app, sobre una muestra que incluye los casos límite.
+        sample = list(range(0, len(inputs), 50)) + list(range(GOLDEN_ROWS, len(inputs)))
+        single = np.array([score_frame(clamp_frame(inputs.iloc[[i]]), engine=engine)[0] for i in sample])
+        diffs = {col: float(np.max(np.abs(batch[col] - golden[col]))) for col in GOLDEN_COLUMNS}
+        diffs['single_row'] = float(np.max(np.abs(single - golden['predicted_productivity'].iloc[sample])))
+        bad = {k: v for k, v in diffs.items() if v > GOLDEN_TOLERANCE}
+        ok &= not bad
+        status = "OK" if not bad else f"DIFERENCIAS en {', '.join(bad)}"
+        print(f"{engine:<9} max |diff| " + "  ".join(f"{k}={v:.1e}" for k, v in diffs.items()) + f"  {status}")
+    return ok
+
+
+# --- Exactitud frente a datos etiquetados ---
+
+def accuracy(path, target):
+    df = pd.read_csv(path)
+    y = df[target].to_numpy(dtype=float)
+    pred = score_frame(clamp_frame(df), engine=BATCH_ENGINE)
+    rmse = float(np.sqrt(np.mean((y - pred) ** 2)))
+    r2 = float(1 - np.sum((y - pred) ** 2) / np.sum((y - y.mean()) ** 2))
+    nonzero = y != 0
+    mape = float(np.mean(np.abs((y[nonzero] - pred[nonzero]) / y[nonzero])) * 100)
+    return {'rows': len(df), 'r2': r2, 'rmse': rmse, 'mape': mape}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark y regresión de exactitud del pipeline")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    speed = sub.add_parser('speed', help="Throughput y memoria pico")
+    speed.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                       help="Tamaños separados por comas")
+    speed.add_argument('--engine', choices=ENGINES, action='append', help="Motores (por defecto, todos)")
+    speed.add_argument('--json', help="Guarda los resultados en este fichero JSON")
+
+    golden = sub.add_parser('golden', help="Compara con las salidas de referencia")
+    golden.add_argument('--update', action='store_true', help="Regenera golden_predictions.csv")
+
+    acc = sub.add_parser('accuracy', help="R², RMSE y MAPE sobre un CSV etiquetado")
+    acc.add_argument('data')
+    acc.add_argument('--target', default='actual_productivity_score')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'speed':
+        results = run_speed([int(s) for s in args.sizes.split(',')], args.engine or ENGINES)
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(results, f, indent=2)
+        return 0
+
+    if args.command == 'golden':
+        if args.update:
+            update_golden()
+            return 0
+        if not check_golden():
+            print("❌ Las puntuaciones no coinciden con la referencia")
+            return 1
+        return 0
+
+    r = accuracy(args.data, args.target)
+    print(f"{r['rows']} filas  R²={r['r2']:.3f}  RMSE={r['rmse']:.3f}  MAPE={r['mape']:.2f}%")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,260 @@
+"""Motor de inferencia compilado: preprocesador y ensemble como arrays planos.
+
+``export`` recorre el ColumnTransformer (StandardScaler + OneHotEncoder) y los
+árboles del GradientBoostingRegressor y los guarda en un ``.npz`` con arrays
+de NumPy. ``CompiledPipeline`` evalúa esos arrays sobre vectores de
+características crudos, sin DataFrames ni ``transform`` de sklearn, y da las
+mismas predicciones que el pipeline original (ver ``check_parity``).
+
+Cargar el ``.npz`` solo necesita NumPy (ni pandas, ni joblib, ni sklearn), y
+el fichero guarda como metadatos el orden de columnas, las categorías y el
+hash de los pickles de origen, para detectar una exportación desactualizada.
+
+Uso:
+    python compiled.py export              # compila, comprueba paridad y guarda
+    python compiled.py check               # comprueba paridad del .npz existente
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+COMPILED_PATH = os.path.join(BASE_DIR, 'compiled_model.npz')
+
+# Versión del formato del .npz; se incrementa si cambian los arrays guardados.
+FORMAT_VERSION = 1
+PARITY_TOLERANCE = 1e-9
+# Filas por bloque al recorrer los árboles: acota la matriz (filas x árboles) de nodos.
+EVAL_BLOCK_ROWS = 8192
+
+
+# --- Exportación ---
+
+def compile_pipeline(preprocessor, model):
+    """Extrae los parámetros del pipeline ajustado como un dict de arrays."""
+    from scoring import CATEGORICAL_FEATURES, NUMERIC_RANGES
+
+    num_cols = list(preprocessor.named_transformers_['num'].feature_names_in_)
+    cat_cols = list(preprocessor.named_transformers_['cat'].feature_names_in_)
+    if num_cols != list(NUMERIC_RANGES) or cat_cols != CATEGORICAL_FEATURES:
+        raise ValueError("Las columnas del preprocesador no coinciden con las de scoring.py")
+
+    scaler = preprocessor.named_transformers_['num']
+    n_num = len(num_cols)
+    mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(n_num)
+    scale = scaler.scale_ if scaler.scale_ is not None else np.ones(n_num)
+
+    encoder = preprocessor.named_transformers_['cat']
+    drop_idx = encoder.drop_idx_ if encoder.drop_idx_ is not None else [None] * len(cat_cols)
+
+    compiled = {
+        'format_version': np.int64(FORMAT_VERSION),
+        'feature_names_in': np.array(preprocessor.feature_names_in_, dtype=str),
+        'numeric_features': np.array(num_cols),
+        'categorical_features': np.array(cat_cols),
+        'feature_names_out': np.array(preprocessor.get_feature_names_out(), dtype=str),
+        'scaler_mean': np.asarray(mean, dtype=np.float64),
+        'scaler_scale': np.asarray(scale, dtype=np.float64),
+        'drop_idx': np.array([-1 if d is None else int(d) for d in drop_idx], dtype=np.int64),
+    }
+    for i, categories in enumerate(encoder.categories_):
+        compiled[f'categories_{i}'] = np.array(categories, dtype=str)
+
+    trees = [est.tree_ for est in model.estimators_[:, 0]]
+    n_trees = len(trees)
+    max_nodes = max(t.node_count for t in trees)
+    feature = np.zeros((n_trees, max_nodes), dtype=np.int32)
+    threshold = np.zeros((n_trees, max_nodes), dtype=np.float64)
+    left = np.zeros((n_trees, max_nodes), dtype=np.int32)
+    right = np.zeros((n_trees, max_nodes), dtype=np.int32)
+    value = np.zeros((n_trees, max_nodes), dtype=np.float64)
+    cover = np.zeros((n_trees, max_nodes), dtype=np.float64)
+    for k, t in enumerate(trees):
+        n = t.node_count
+        is_leaf = t.children_left == -1
+        nodes = np.arange(n)
+        # Las hojas apuntan a sí mismas: recorrer max_depth niveles siempre acaba en una hoja.
+        feature[k, :n] = np.where(is_leaf, 0, t.feature)
+        threshold[k, :n] = np.where(is_leaf, 0.0, t.threshold)
+        left[k, :n] = np.where(is_leaf, nodes, t.children_left)
+        right[k, :n] = np.where(is_leaf, nodes, t.children_right)
+        # La tasa de aprendizaje se pliega en el valor de las hojas.
+        value[k, :n] = model.learning_rate * t.value[:, 0, 0]
+        # Peso de entrenamiento de cada nodo, necesario para las atribuciones (TreeSHAP).
+        cover[k, :n] = t.weighted_n_node_samples
+
+    compiled.update({
+        'tree_feature': feature,
+        'tree_threshold': threshold,
+        'tree_left': left,
+        'tree_right': right,
+        'tree_value': value,
+        'tree_cover': cover,
+        'max_depth': np.int64(max(t.max_depth for t in trees)),
+        'init_value': np.float64(np.ravel(model.init_.constant_)[0]),
+    })
+    return compiled
+
+
+def source_hash():
+    """SHA-256 de los pickles de origen, o None si no están en disco."""
+    from artifacts import _file_hash, registry
+
+    paths = [registry.path('preprocessor'), registry.path('model')]
+    if not all(os.path.exists(p) for p in paths):
+        return None
+    return _file_hash(*paths)
+
+
+def save_compiled(compiled, path=COMPILED_PATH):
+    # Sin compresión: np.load lee los arrays directamente, sin descomprimir.
+    np.savez(path, source_sha256=np.array(source_hash() or ''), **compiled)
+
+
+def load_compiled(path=COMPILED_PATH):
+    with np.load(path, allow_pickle=False) as data:
+        arrays = {k: data[k] for k in data.files}
+    if int(arrays.get('format_version', 0)) != FORMAT_VERSION:
+        raise ValueError(f"{os.path.basename(path)} tiene un formato antiguo; ejecute 'python compiled.py export'")
+    current = source_hash()
+    if current is not None and str(arrays.get('source_sha256', '')) != current:
+        raise ValueError(f"{os.path.basename(path)} no corresponde a los pickles actuales; "
+                         "ejecute 'python compiled.py export'")
+    return CompiledPipeline(arrays)
+
+
+# --- Evaluación ---
+
+class CompiledPipeline:
+    """Pipeline preprocesador + modelo evaluado con NumPy sobre arrays planos."""
+
+    def __init__(self, arrays):
+        self.arrays = arrays
+        self.numeric_features = [str(c) for c in arrays['numeric_features']]
+        self.categorical_features = [str(c) for c in arrays['categorical_features']]
+        self.feature_names_out = [str(c) for c in arrays['feature_names_out']]
+        self.mean = arrays['scaler_mean']
+        self.scale = arrays['scaler_scale']
+        self.categories = [arrays[f'categories_{i}'] for i in range(len(self.categorical_features))]
+        self.drop_idx = arrays['drop_idx']
+        self.feature = arrays['tree_feature']
+        self.threshold = arrays['tree_threshold']
+        self.left = arrays['tree_left']
+        self.right = arrays['tree_right']
+        self.value = arrays['tree_value']
+        self.cover = arrays['tree_cover']
+        self.max_depth = int(arrays['max_depth'])
+        self.init_value = float(arrays['init_value'])
+        self.n_trees, max_nodes = self.feature.shape
+
+        # Versiones planas de los arrays de árboles, con los hijos como índices globales.
+        offsets = (np.arange(self.n_trees) * max_nodes)[:, None]
+        self._root = offsets[:, 0]
+        self._feature = self.feature.ravel()
+        self._threshold = self.threshold.ravel()
+        self._left = (self.left + offsets).ravel()
+        self._right = (self.right + offsets).ravel()
+        self._value = self.value.ravel()
+
+    def encode(self, numeric, categorical):
+        """Equivalente a ``preprocessor.transform`` sobre arrays crudos.
+
+        ``numeric``: (n, 12) en el orden de ``numeric_features``.
+        ``categorical``: (n, 3) de textos en el orden de ``categorical_features``.
+        """
+        numeric = np.asarray(numeric, dtype=np.float64)
+        if np.isnan(numeric).any():
+            raise ValueError("La entrada contiene NaN")
+        categorical = np.asarray(categorical, dtype=str)
+        n = numeric.shape[0]
+
+        blocks = [(numeric - self.mean) / self.scale]
+        for j, categories in enumerate(self.categories):
+            values = categorical[:, j]
+            codes = np.searchsorted(categories, values)
+            codes = np.minimum(codes, len(categories) - 1)
+            # Categorías desconocidas (handle_unknown='ignore') -> todo ceros.
+            known = categories[codes] == values
+            onehot = np.zeros((n, len(categories)))
+            onehot[np.flatnonzero(known), codes[known]] = 1.0
+            if self.drop_idx[j] >= 0:
+                onehot = np.delete(onehot, self.drop_idx[j], axis=1)
+            blocks.append(onehot)
+        return np.hstack(blocks)
+
+    def predict_encoded(self, X):
+        """Evalúa el ensemble sobre la matriz ya codificada (n, 22)."""
+        # Los árboles de sklearn comparan en float32 contra umbrales float64.
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        n_rows, n_cols = X.shape
+        out = np.empty(n_rows)
+        for start in range(0, n_rows, EVAL_BLOCK_ROWS):
+            block = X[start:start + EVAL_BLOCK_ROWS].ravel()
+            rows = np.arange(len(block) // n_cols)[:, None] * n_cols
+            # Índices planos (árbol * max_nodes + nodo) para usar take() en arrays 1D.
+            node = np.broadcast_to(self._root, (len(rows), self.n_trees))
+            for _ in range(self.max_depth):
+                go_left = block.take(rows + self._feature.take(node)) <= self._threshold.take(node)
+                node = np.where(go_left, self._left.take(node), self._right.take(node))
+            out[start:start + EVAL_BLOCK_ROWS] = self.init_value + self._value.take(node).sum(axis=1)
+        return out
+
+    def predict_raw(self, numeric, categorical):
+        """Predicción del modelo (sin ajuste por reglas) sobre vectores crudos."""
+        return self.predict_encoded(self.encode(numeric, categorical))
+
+    def encode_frame(self, df):
+        """Igual que ``encode`` pero tomando las columnas de un DataFrame."""
+        numeric = np.column_stack([df[col].to_numpy(dtype=np.float64) for col in self.numeric_features])
+        categorical = np.column_stack([df[col].astype(str).to_numpy() for col in self.categorical_features])
+        return self.encode(numeric, categorical)
+
+    def predict_frame(self, df):
+        """Igual que ``predict_raw`` pero tomando las columnas de un DataFrame."""
+        return self.predict_encoded(self.encode_frame(df))
+
+
+# --- Paridad ---
+
+def check_parity(compiled, preprocessor, model, n=5000, seed=0):
+    """Máxima diferencia absoluta entre el motor compilado y el pipeline de sklearn."""
+    from scoring import random_inputs
+
+    categories = dict(zip(compiled.categorical_features, compiled.categories))
+    df = random_inputs(n, seed, categories=categories, unknown_category=True)
+    expected = model.predict(preprocessor.transform(df[list(preprocessor.feature_names_in_)]))
+    return float(np.max(np.abs(compiled.predict_frame(df) - expected)))
+
+
+def main(argv=None):
+    from artifacts import get_model, get_preprocessor
+
+    parser = argparse.ArgumentParser(description="Compila el pipeline a arrays de NumPy")
+    parser.add_argument('command', choices=['export', 'check'])
+    parser.add_argument('--output', default=COMPILED_PATH, help="Ruta del .npz compilado")
+    parser.add_argument('--samples', type=int, default=20000, help="Filas para la comprobación de paridad")
+    args = parser.parse_args(argv)
+
+    preprocessor, model = get_preprocessor(), get_model()
+    if args.command == 'export':
+        compiled = CompiledPipeline(compile_pipeline(preprocessor, model))
+    else:
+        compiled = load_compiled(args.output)
+
+    diff = check_parity(compiled, preprocessor, model, n=args.samples)
+    print(f"Paridad con sklearn sobre {args.samples} filas: max |diff| = {diff:.3e}")
+    if diff > PARITY_TOLERANCE:
+        print(f"❌ Diferencia por encima de la tolerancia ({PARITY_TOLERANCE:g})")
+        return 1
+
+    if args.command == 'export':
+        save_compiled(compiled.arrays, args.output)
+        print(f"✅ Pipeline compilado guardado en {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
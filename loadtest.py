@@ -0,0 +1,87 @@
+"""Prueba de carga local de la API de predicción.
+
+Lanza peticiones concurrentes contra ``/predict`` con conexiones keep-alive
+y muestra el throughput y las latencias p50/p90/p99.
+
+Uso:
+    python api.py --port 8000 &
+    python loadtest.py --url http://127.0.0.1:8000 --requests 5000 --concurrency 32
+"""
+
+import argparse
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlparse
+
+import numpy as np
+
+from scoring import DEFAULT_INPUT
+
+
+def _worker(host, port, body, count, latencies, errors, lock):
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    local, failed = [], 0
+    for _ in range(count):
+        start = time.perf_counter()
+        try:
+            conn.request("POST", "/predict", body=body, headers={"Content-Type": "application/json"})
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                failed += 1
+        except (OSError, http.client.HTTPException):
+            failed += 1
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=30)
+        local.append(time.perf_counter() - start)
+    conn.close()
+    with lock:
+        latencies.extend(local)
+        errors.append(failed)
+
+
+def run(url, total, concurrency, payload=None):
+    parsed = urlparse(url)
+    body = json.dumps(payload or DEFAULT_INPUT)
+    latencies, errors, lock = [], [], threading.Lock()
+    per_worker = [total // concurrency + (1 if i < total % concurrency else 0) for i in range(concurrency)]
+
+    threads = [
+        threading.Thread(target=_worker, args=(parsed.hostname, parsed.port or 80, body, n, latencies, errors, lock))
+        for n in per_worker
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    ms = np.array(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "errors": sum(errors),
+        "seconds": elapsed,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p90_ms": float(np.percentile(ms, 90)),
+        "p99_ms": float(np.percentile(ms, 99)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga de la API de predicción")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args(argv)
+
+    r = run(args.url, args.requests, args.concurrency)
+    print(f"{r['requests']} peticiones ({r['errors']} errores) en {r['seconds']:.2f}s -> {r['rps']:.0f} req/s")
+    print(f"latencia p50={r['p50_ms']:.2f}ms  p90={r['p90_ms']:.2f}ms  p99={r['p99_ms']:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""Instrumentación del camino de inferencia.
+
+Histogramas de latencia por etapa (preprocesado, predicción, ajuste...),
+filas puntuadas, errores por etapa y métricas de otros módulos (p. ej. la
+caché de predicciones) registradas como colectores. Los datos se exponen en
+formato de texto de Prometheus (``render_prometheus``) y como JSON
+(``snapshot``), y la página de métricas de la app muestra los percentiles.
+
+Las métricas son de cada proceso: la app de Streamlit y la API llevan las
+suyas. La API las sirve en sus rutas ``/metrics``; los procesos sin servidor
+HTTP propio (la app) las sirven con ``serve_metrics`` si METRICS_PORT está
+definido.
+
+Configuración por entorno:
+    METRICS_SAMPLE_RATE  fracción de llamadas cronometradas (por defecto 1.0).
+                         Los contadores de llamadas, filas y errores son siempre
+                         exactos; solo se muestrea la medida de tiempo.
+    METRICS_PORT         puerto de ``/metrics`` y ``/metrics.json`` en la app
+                         (por defecto ninguno: no se sirven). Streamlit no
+                         ejecuta app.py hasta la primera sesión, así que el
+                         servidor arranca con ella.
+    METRICS_HOST         interfaz de ese servidor (por defecto 127.0.0.1)
+"""
+
+import bisect
+import contextlib
+import json
+import os
+import random
+import threading
+import time
+import warnings
+from collections import deque
+
+SAMPLE_RATE = float(os.environ.get('METRICS_SAMPLE_RATE', '1.0'))
+METRICS_PORT = int(os.environ.get('METRICS_PORT', '0'))
+METRICS_HOST = os.environ.get('METRICS_HOST', '127.0.0.1')
+
+# Límites superiores (segundos) de los buckets de latencia.
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Muestras recientes por etapa para los percentiles en vivo.
+RESERVOIR_SIZE = 2048
+# Ventana (segundos) del throughput reciente.
+THROUGHPUT_WINDOW = 60.0
+
+PREFIX = 'productivity'
+
+
+class Histogram:
+    """Histograma acumulativo con buckets fijos y muestras recientes para percentiles."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS, reservoir=RESERVOIR_SIZE):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=reservoir)
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.sum += value
+            self.count += 1
+            self.recent.append(value)
+
+    def percentiles(self, qs=(50, 90, 99)):
+        with self._lock:
+            values = sorted(self.recent)
+        if not values:
+            return {f'p{q}': None for q in qs}
+        return {f'p{q}': values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))] for q in qs}
+
+
+class Metrics:
+    """Métricas del proceso: latencias por etapa, llamadas, filas y errores."""
+
+    def __init__(self, sample_rate=SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._collectors = []
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.latency = {}
+            self.calls = {}
+            self.errors = {}
+            self.rows = 0
+            self._recent_rows = deque()
+            self.started_at = time.time()
+
+    def _histogram(self, stage):
+        hist = self.latency.get(stage)
+        if hist is None:
+            with self._lock:
+                hist = self.latency.setdefault(stage, Histogram())
+        return hist
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Cronometra el bloque como la etapa ``name`` y cuenta sus errores."""
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+        sampled = self.sample_rate >= 1.0 or random.random() < self.sample_rate
+        start = time.perf_counter() if sampled else None
+        try:
+            yield
+        except Exception:
+            self.count_error(name)
+            raise
+        finally:
+            if sampled:
+                self._histogram(name).observe(time.perf_counter() - start)
+
+    def count_error(self, name):
+        """Cuenta un error de ``name`` que no llegó como excepción (p. ej. una respuesta 4xx)."""
+        with self._lock:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def add_rows(self, n):
+        now = time.monotonic()
+        with self._lock:
+            self.rows += n
+            self._recent_rows.append((now, n))
+            while self._recent_rows and now - self._recent_rows[0][0] > THROUGHPUT_WINDOW:
+                self._recent_rows.popleft()
+
+    def register_collector(self, fn):
+        """``fn()`` devuelve un dict {nombre: valor} que se añade a cada exportación."""
+        self._collectors.append(fn)
+
+    def _collected(self):
+        values = {}
+        for fn in self._collectors:
+            values.update(fn())
+        return values
+
+    def throughput(self):
+        """Filas por segundo: media desde el arranque y en la ventana reciente."""
+        now = time.monotonic()
+        with self._lock:
+            recent = sum(n for t, n in self._recent_rows if now - t <= THROUGHPUT_WINDOW)
+            rows = self.rows
+        uptime = max(time.time() - self.started_at, 1e-9)
+        return {'rows_per_second': rows / uptime, 'recent_rows_per_second': recent / min(THROUGHPUT_WINDOW, uptime)}
+
+    def _copy(self):
+        with self._lock:
+            return dict(self.latency), dict(self.calls), dict(self.errors), self.rows
+
+    def snapshot(self):
+        """Estado completo como dict serializable a JSON."""
+        latency, calls, errors, rows = self._copy()
+        stages = {}
+        for name in sorted(set(calls) | set(latency)):
+            hist = latency.get(name)
+            stages[name] = {
+                'calls': calls.get(name, 0),
+                'sampled': hist.count if hist else 0,
+                'errors': errors.get(name, 0),
+                'mean': hist.sum / hist.count if hist and hist.count else None,
+                **(hist.percentiles() if hist else {}),
+            }
+        return {
+            'pid': os.getpid(),
+            'uptime_seconds': time.time() - self.started_at,
+            'sample_rate': self.sample_rate,
+            'rows_scored': rows,
+            **self.throughput(),
+            'stages': stages,
+            'collected': self._collected(),
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.snapshot(), **kwargs)
+
+    def render_prometheus(self):
+        """Exportación en formato de texto de Prometheus."""
+        latency, calls, errors, rows = self._copy()
+        lines = [
+            f'# HELP {PREFIX}_stage_latency_seconds Latencia por etapa del camino de inferencia.',
+            f'# TYPE {PREFIX}_stage_latency_seconds histogram',
+        ]
+        for name, hist in sorted(latency.items()):
+            with hist._lock:
+                counts, total, count = list(hist.counts), hist.sum, hist.count
+            cumulative = 0
+            for bound, c in zip(hist.buckets, counts):
+                cumulative += c
+                lines.append(f'{PREFIX}_stage_latency_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{PREFIX}_stage_latency_seconds_bucket{{stage="{name}",le="+Inf"}} {count}')
+            lines.append(f'{PREFIX}_stage_latency_seconds_sum{{stage="{name}"}} {total}')
+            lines.append(f'{PREFIX}_stage_latency_seconds_count{{stage="{name}"}} {count}')
+
+        lines += [f'# HELP {PREFIX}_stage_calls_total Llamadas por etapa (sin muestreo).',
+                  f'# TYPE {PREFIX}_stage_calls_total counter']
+        lines += [f'{PREFIX}_stage_calls_total{{stage="{n}"}} {c}' for n, c in sorted(calls.items())]
+        lines += [f'# HELP {PREFIX}_stage_errors_total Errores por etapa.',
+                  f'# TYPE {PREFIX}_stage_errors_total counter']
+        lines += [f'{PREFIX}_stage_errors_total{{stage="{n}"}} {c}' for n, c in sorted(errors.items())]
+        lines += [f'# HELP {PREFIX}_rows_scored_total Filas puntuadas.',
+                  f'# TYPE {PREFIX}_rows_scored_total counter',
+                  f'{PREFIX}_rows_scored_total {rows}']
+        for name, value in sorted(self._collected().items()):
+            lines += [f'# TYPE {PREFIX}_{name} gauge', f'{PREFIX}_{name} {value}']
+        return '\n'.join(lines) + '\n'
+
+
+# --- Instancia por defecto del proceso ---
+metrics = Metrics()
+
+
+# --- Servidor HTTP para procesos sin uno propio ---
+_server = None
+_server_failed = False
+_server_lock = threading.Lock()
+
+
+def serve_metrics(port=METRICS_PORT, host=METRICS_HOST, registry=metrics):
+    """Sirve ``/metrics`` (Prometheus) y ``/metrics.json`` en un hilo de fondo.
+
+    Arranca una sola vez por proceso, así que se puede llamar en cada rerun
+    de Streamlit. No hace nada si ``port`` es 0; devuelve el servidor o None.
+    """
+    global _server, _server_failed
+    if not port:
+        return None
+    with _server_lock:
+        if _server is not None or _server_failed:
+            return _server
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/metrics':
+                    body, ctype = registry.render_prometheus(), 'text/plain; version=0.0.4'
+                elif self.path == '/metrics.json':
+                    body, ctype = registry.to_json(), 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                body = body.encode()
+                self.send_response(200)
+                self.send_header('Content-Type', ctype)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            _server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as e:
+            _server_failed = True
+            warnings.warn(f"No se pudo servir las métricas en {host}:{port}: {e}")
+            return None
+        threading.Thread(target=_server.serve_forever, name='metrics-server', daemon=True).start()
+        return _server
@@ -0,0 +1,55 @@
+import os
+import tempfile
+
+import streamlit as st
+import pandas as pd
+
+from batch import DEFAULT_CHUNKSIZE, ERROR_COLUMN, score_csv
+from scoring import CATEGORICAL_FEATURES, NUMERIC_RANGES
+
+PREVIEW_ROWS = 20
+
+st.title("📂 Puntuación masiva")
+
+st.markdown("""
+*Sube una exportación CSV de empleados para puntuarla completa.*  
+El fichero se procesa por bloques, por lo que admite decenas de miles de filas.
+""")
+
+with st.expander("📋 Columnas esperadas"):
+    st.write(", ".join(list(NUMERIC_RANGES) + CATEGORICAL_FEATURES))
+
+uploaded = st.file_uploader("Fichero CSV", type=["csv"])
+fmt = st.radio("Formato de salida", ["csv", "parquet"], horizontal=True)
+chunksize = st.number_input("Filas por bloque", 1000, 100000, DEFAULT_CHUNKSIZE, step=1000)
+
+if uploaded is not None and st.button("🚀 Puntuar fichero"):
+    progress = st.empty()
+    out_path = os.path.join(tempfile.mkdtemp(), f"predicciones.{fmt}")
+    try:
+        result = score_csv(uploaded, out_path, chunksize=int(chunksize), fmt=fmt,
+                         on_chunk=lambda n: progress.caption(f"{n} filas procesadas…"))
+    except Exception as e:
+        st.error(f"❌ Error durante la puntuación: {e}")
+        st.stop()
+
+    rows, invalid = result["rows"], result["invalid"]
+    st.success(f"✅ {rows - invalid} de {rows} filas puntuadas.")
+    if invalid:
+        st.warning(f"⚠️ {invalid} filas con valores vacíos o no numéricos no se han puntuado; "
+                   f"el motivo figura en la columna '{ERROR_COLUMN}' del resultado.")
+
+    # Solo las primeras filas: el resultado completo puede no caber en memoria.
+    if fmt == "csv":
+        preview = pd.read_csv(out_path, nrows=PREVIEW_ROWS)
+    else:
+        import pyarrow.parquet as pq
+        preview = next(pq.ParquetFile(out_path).iter_batches(batch_size=PREVIEW_ROWS)).to_pandas()
+    st.subheader(f"👀 Vista previa (primeras {len(preview)} filas)")
+    st.write(preview)
+
+    st.subheader("📊 Resumen de las puntuaciones (fichero completo)")
+    st.write(result["summary"].to_frame())
+
+    with open(out_path, "rb") as f:
+        st.download_button("⬇️ Descargar resultados", f, file_name=os.path.basename(out_path))
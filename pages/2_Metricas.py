@@ -0,0 +1,61 @@
+import streamlit as st
+import pandas as pd
+
+# Importar prediction_cache registra sus métricas aunque se abra esta página primero.
+import prediction_cache  # noqa: F401
+from metrics import METRICS_PORT, metrics, serve_metrics
+
+serve_metrics()
+
+st.title("📈 Métricas de inferencia")
+
+st.markdown("""
+*Latencias por etapa, throughput, errores y caché de este proceso (la app).*  
+Los percentiles se calculan sobre las últimas muestras de cada etapa. La API
+es un proceso aparte y expone las suyas en su propia ruta `/metrics`.
+""")
+
+if st.button("🔄 Actualizar"):
+    st.rerun()
+
+snapshot = metrics.snapshot()
+
+col1, col2, col3 = st.columns(3)
+with col1:
+    st.metric("Filas puntuadas", f"{snapshot['rows_scored']}",
+              help="Predicciones de la app y puntuación masiva de este proceso; no incluye la API "
+                   "(proceso aparte), los barridos de sensibilidad ni la tabla precalculada.")
+with col2:
+    st.metric("Throughput (último minuto)", f"{snapshot['recent_rows_per_second']:.2f} filas/s")
+with col3:
+    hit_ratio = snapshot['collected'].get('prediction_cache_hit_ratio')
+    st.metric("Tasa de aciertos de caché", "-" if hit_ratio is None else f"{hit_ratio:.1%}")
+
+st.subheader("⏱️ Latencia por etapa (ms)")
+if snapshot['stages']:
+    rows = {}
+    for stage, s in snapshot['stages'].items():
+        rows[stage] = {
+            "llamadas": s['calls'],
+            "muestras": s['sampled'],
+            "errores": s['errors'],
+            **{k: None if s.get(k) is None else s[k] * 1000 for k in ("mean", "p50", "p90", "p99")},
+        }
+    st.dataframe(pd.DataFrame.from_dict(rows, orient="index"))
+else:
+    st.info("ℹ️ Aún no hay predicciones en este proceso.")
+
+st.caption(f"Muestreo: {snapshot['sample_rate']:.0%} de las llamadas · "
+           f"Activo desde hace {snapshot['uptime_seconds'] / 60:.1f} min")
+
+with st.expander("📄 Exportación"):
+    if METRICS_PORT:
+        st.caption(f"Prometheus: `/metrics` y `/metrics.json` en el puerto {METRICS_PORT} de este proceso.")
+    else:
+        st.caption("Defina METRICS_PORT para exponer estas métricas a Prometheus.")
+    st.download_button("⬇️ JSON", metrics.to_json(indent=2), file_name="metrics.json")
+    st.code(metrics.render_prometheus(), language="text")
+
+if st.button("🗑️ Reiniciar métricas"):
+    metrics.reset()
+    st.rerun()
@@ -0,0 +1,210 @@
+"""Caché de predicciones indexada por la entrada normalizada.
+
+Las entradas de la app salen de widgets con rangos fijos, así que las mismas
+combinaciones se repiten entre usuarios y reruns. La caché (LRU + TTL) vive a
+nivel de proceso, igual que el registro de artefactos, y se consulta antes
+de llamar al preprocesador y al modelo.
+
+Opcionalmente (PREDICTION_LOOKUP=1) se precalcula una tabla sobre una rejilla
+gruesa de las variables más usadas, con el resto en sus valores por defecto.
+
+Configuración por entorno:
+    PREDICTION_CACHE_SIZE  entradas máximas (por defecto 4096; 0 desactiva la caché)
+    PREDICTION_CACHE_TTL   segundos de vida de cada entrada (por defecto 3600; 0 = sin caducidad)
+    PREDICTION_LOOKUP      1 para construir la tabla precalculada
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from metrics import metrics
+from scoring import DEFAULT_INPUT, FEATURES, NUMERIC_RANGES
+
+CACHE_SIZE = int(os.environ.get('PREDICTION_CACHE_SIZE', '4096'))
+CACHE_TTL = float(os.environ.get('PREDICTION_CACHE_TTL', '3600'))
+LOOKUP_ENABLED = os.environ.get('PREDICTION_LOOKUP', '0') == '1'
+
+# Decimales al normalizar: los sliders y number_input de la app usan pasos de 0.01.
+KEY_DECIMALS = 2
+
+# Rejilla de la tabla precalculada: las variables con más peso en el modelo.
+LOOKUP_GRID = {
+    'job_satisfaction_score': np.arange(0.0, 10.01, 0.5),
+    'sleep_hours': np.arange(0.0, 12.01, 0.5),
+    'stress_level': np.arange(1.0, 10.01, 0.5),
+}
+
+
+def normalize_key(record):
+    """Tupla hashable con los valores de ``record`` redondeados al paso de los widgets.
+
+    La clave no incluye el motor de inferencia: ambos motores dan la misma
+    puntuación (ver ``compiled.check_parity``).
+    """
+    key = []
+    for col in FEATURES:
+        value = record[col]
+        if col in NUMERIC_RANGES:
+            value = round(float(value), KEY_DECIMALS) + 0.0  # +0.0 unifica -0.0 y 0.0
+        else:
+            value = str(value)
+        key.append(value)
+    return tuple(key)
+
+
+class PredictionCache:
+    """Caché LRU con caducidad por TTL y contadores de uso."""
+
+    def __init__(self, maxsize=CACHE_SIZE, ttl=CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                value, stored_at = item
+                if self.ttl and time.monotonic() - stored_at > self.ttl:
+                    del self._data[key]
+                    self.expirations += 1
+                else:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+class LookupTable:
+    """Puntuaciones precalculadas sobre una rejilla, el resto de variables por defecto."""
+
+    def __init__(self, table, grid, base):
+        self.table = table
+        self.grid = grid
+        self.base = base
+        self.hits = 0
+
+    @classmethod
+    def build(cls, score_fn, grid=LOOKUP_GRID, base=DEFAULT_INPUT):
+        """Puntúa toda la rejilla con una sola llamada a ``score_fn(DataFrame)``."""
+        cols = list(grid)
+        mesh = np.meshgrid(*[grid[col] for col in cols], indexing='ij')
+        df = pd.DataFrame({col: base[col] for col in FEATURES}, index=range(mesh[0].size))
+        for col, values in zip(cols, mesh):
+            df[col] = values.ravel()
+        scores = score_fn(df)
+        base_key = normalize_key(base)
+        positions = [FEATURES.index(col) for col in cols]
+        table = {}
+        for row, score in zip(df[cols].itertuples(index=False), scores):
+            key = list(base_key)
+            for pos, value in zip(positions, row):
+                key[pos] = round(float(value), KEY_DECIMALS) + 0.0
+            table[tuple(key)] = float(score)
+        return cls(table, grid, base)
+
+    def get(self, key):
+        value = self.table.get(key)
+        if value is not None:
+            self.hits += 1
+        return value
+
+    def __len__(self):
+        return len(self.table)
+
+
+# --- Instancias por defecto del proceso ---
+prediction_cache = PredictionCache()
+_lookup_table = None
+_lookup_lock = threading.Lock()
+
+
+def get_lookup_table(score_fn):
+    """Tabla precalculada del proceso (se construye en la primera llamada)."""
+    global _lookup_table
+    if _lookup_table is None:
+        with _lookup_lock:
+            if _lookup_table is None:
+                _lookup_table = LookupTable.build(score_fn)
+    return _lookup_table
+
+
+def cached_score(record, compute, score_fn=None):
+    """Puntuación de ``record`` desde la tabla, la caché o ``compute()``.
+
+    ``score_fn(DataFrame)`` puntúa lotes y solo se usa para construir la
+    tabla precalculada cuando PREDICTION_LOOKUP=1.
+    """
+    key = normalize_key(record)
+    if LOOKUP_ENABLED and score_fn is not None:
+        value = get_lookup_table(score_fn).get(key)
+        if value is not None:
+            return value
+    value = prediction_cache.get(key)
+    if value is None:
+        value = float(compute())
+        prediction_cache.put(key, value)
+    return value
+
+
+def cache_stats():
+    stats = prediction_cache.stats()
+    stats['lookup_enabled'] = LOOKUP_ENABLED
+    stats['lookup_size'] = len(_lookup_table) if _lookup_table is not None else 0
+    stats['lookup_hits'] = _lookup_table.hits if _lookup_table is not None else 0
+    return stats
+
+
+def _cache_metrics():
+    stats = cache_stats()
+    return {
+        'prediction_cache_size': stats['size'],
+        'prediction_cache_hits': stats['hits'],
+        'prediction_cache_misses': stats['misses'],
+        'prediction_cache_evictions': stats['evictions'],
+        'prediction_cache_hit_ratio': stats['hit_rate'],
+        'prediction_lookup_hits': stats['lookup_hits'],
+    }
+
+
+metrics.register_collector(_cache_metrics)
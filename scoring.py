@@ -0,0 +1,230 @@
+"""Lógica de puntuación compartida por la app, el modo masivo y la CLI.
+
+Todas las funciones trabajan sobre DataFrames completos: una fila (la app)
+o un chunk de miles de filas (modo masivo) pasan por el mismo camino
+vectorizado.
+"""
+
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from artifacts import get_compiled, get_model, get_preprocessor
+from metrics import metrics
+
+# Motor de inferencia: 'compiled' (arrays de NumPy exportados con
+# ``python compiled.py export``, carga sin importar sklearn) o 'sklearn'
+# (preprocesador + modelo pickled). El compilado arranca y puntúa pocas filas
+# más rápido (app y API); con lotes grandes sklearn es ~2x más rápido y usa
+# mucha menos memoria, así que sigue siendo el motor de la puntuación masiva.
+ENGINES = ('sklearn', 'compiled')
+DEFAULT_ENGINE = os.environ.get('INFERENCE_ENGINE', 'compiled')
+BATCH_ENGINE = os.environ.get('BATCH_INFERENCE_ENGINE', 'sklearn')
+
+# Mismos rangos que los widgets de user_input() en app.py.
+NUMERIC_RANGES = {
+    'number_of_notifications': (0, 200),
+    'work_hours_per_day': (0.0, 16.0),
+    'stress_level': (1.0, 10.0),
+    'sleep_hours': (0.0, 12.0),
+    'screen_time_before_sleep': (0.0, 5.0),
+    'breaks_during_work': (0, 20),
+    'uses_focus_apps': (0, 1),
+    'has_digital_wellbeing_enabled': (0, 1),
+    'coffee_consumption_per_day': (0, 10),
+    'days_feeling_burnout_per_month': (0, 31),
+    'job_satisfaction_score': (0.0, 10.0),
+    'social_media_log': (0.0, 5.0),
+}
+CATEGORICAL_FEATURES = ['gender', 'job_type', 'social_platform_preference']
+# Opciones de los selectbox de user_input().
+CATEGORY_OPTIONS = {
+    'gender': ["Male", "Female", "Other"],
+    'job_type': ["IT", "Health", "Finance", "Student", "Unemployed"],
+    'social_platform_preference': ["Instagram", "TikTok", "Other"],
+}
+FEATURES = list(NUMERIC_RANGES) + CATEGORICAL_FEATURES
+
+# Valores por defecto de los widgets; sirven de ejemplo y de punto de partida.
+DEFAULT_INPUT = {
+    'number_of_notifications': 60,
+    'work_hours_per_day': 8.0,
+    'stress_level': 5.0,
+    'sleep_hours': 7.0,
+    'screen_time_before_sleep': 1.0,
+    'breaks_during_work': 5,
+    'uses_focus_apps': 1,
+    'has_digital_wellbeing_enabled': 1,
+    'coffee_consumption_per_day': 2,
+    'days_feeling_burnout_per_month': 5,
+    'job_satisfaction_score': 5.0,
+    'social_media_log': 1.5,
+    'gender': 'Male',
+    'job_type': 'IT',
+    'social_platform_preference': 'Instagram',
+}
+
+# Etiquetas de los widgets, para mostrar las variables en la interfaz.
+FEATURE_LABELS = {
+    'number_of_notifications': "Notificaciones por día",
+    'work_hours_per_day': "Horas de trabajo",
+    'stress_level': "Nivel de estrés",
+    'sleep_hours': "Horas de sueño",
+    'screen_time_before_sleep': "Pantalla antes de dormir",
+    'breaks_during_work': "Pausas durante el trabajo",
+    'uses_focus_apps': "Usa apps de enfoque",
+    'has_digital_wellbeing_enabled': "Bienestar digital activado",
+    'coffee_consumption_per_day': "Tazas de café",
+    'days_feeling_burnout_per_month': "Días con burnout al mes",
+    'job_satisfaction_score': "Satisfacción laboral",
+    'social_media_log': "Tiempo en redes sociales",
+    'gender': "Género",
+    'job_type': "Tipo de trabajo",
+    'social_platform_preference': "Red social preferida",
+}
+
+SCORE_MIN, SCORE_MAX = 0, 10
+
+# Puntuaciones auxiliares (barridos de sensibilidad, tabla precalculada,
+# calentamiento de la API): tienen sus propias etapas de métricas y no
+# cuentan como filas puntuadas.
+AUXILIARY_SOURCES = ('sweep', 'lookup', 'warmup')
+
+
+def random_inputs(n, seed=0, decimals=None, categories=None, unknown_category=False):
+    """Entradas aleatorias dentro de los rangos de los widgets (como DataFrame).
+
+    ``decimals=2`` redondea como los pasos de 0.01 de los sliders y
+    number_input; ``categories`` ({columna: opciones}, por defecto las de los
+    selectbox) permite usar las categorías vistas en el entrenamiento, y
+    ``unknown_category`` añade una desconocida para cubrir handle_unknown='ignore'.
+    """
+    categories = categories or CATEGORY_OPTIONS
+    rng = np.random.default_rng(seed)
+    data = {}
+    for col, (lo, hi) in NUMERIC_RANGES.items():
+        if isinstance(lo, int):
+            data[col] = rng.integers(lo, hi + 1, n)
+        else:
+            values = rng.uniform(lo, hi, n)
+            data[col] = np.round(values, decimals) if decimals is not None else values
+    for col in CATEGORICAL_FEATURES:
+        options = list(categories[col]) + (['__desconocida__'] if unknown_category else [])
+        data[col] = rng.choice(options, n)
+    return pd.DataFrame(data, columns=FEATURES)
+
+
+def clamp_frame(df):
+    """Limita las columnas numéricas a los rangos de los widgets."""
+    df = df.copy()
+    for col, (lo, hi) in NUMERIC_RANGES.items():
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').clip(lo, hi)
+    return df
+
+
+def _is_finite(value):
+    try:
+        return math.isfinite(float(value))
+    except OverflowError:
+        return False
+
+
+def validate_record(record):
+    """Devuelve la lista de problemas de un registro de entrada (vacía si es válido)."""
+    if not isinstance(record, dict):
+        return ["el registro debe ser un objeto JSON"]
+    problems = [f"falta el campo '{col}'" for col in FEATURES if col not in record]
+    for col in NUMERIC_RANGES:
+        value = record.get(col)
+        if col in record and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            problems.append(f"'{col}' debe ser numérico")
+        elif col in record and not _is_finite(value):
+            # json.loads acepta NaN, Infinity y enteros de cualquier tamaño.
+            problems.append(f"'{col}' debe ser un número finito")
+    for col in CATEGORICAL_FEATURES:
+        if col in record and not isinstance(record[col], str):
+            problems.append(f"'{col}' debe ser texto")
+    return problems
+
+
+def prepare_frame(df, preprocessor=None):
+    """Ordena las columnas como espera el preprocesador y rellena las que falten con NaN."""
+    preprocessor = preprocessor if preprocessor is not None else get_preprocessor()
+    expected_cols = list(preprocessor.feature_names_in_)
+    missing = [col for col in expected_cols if col not in df.columns]
+    if missing:
+        df = df.assign(**{col: np.nan for col in missing})
+    return df[expected_cols]
+
+
+def _stage(name, source):
+    """Etapa de métricas ``name``, separada por origen (p. ej. 'batch_predict')."""
+    return metrics.stage(f'{source}_{name}' if source else name)
+
+
+def predict_raw(df, preprocessor=None, model=None, engine=None, source=None):
+    """Predicción del modelo sin ajustes, una llamada a transform/predict por DataFrame."""
+    engine = engine or DEFAULT_ENGINE
+    if engine == 'compiled':
+        compiled = get_compiled()
+        with _stage('preprocess', source):
+            X_proc = compiled.encode_frame(df)
+        with _stage('predict', source):
+            return compiled.predict_encoded(X_proc)
+    if engine != 'sklearn':
+        raise ValueError(f"Motor de inferencia desconocido: {engine}")
+    preprocessor = preprocessor if preprocessor is not None else get_preprocessor()
+    model = model if model is not None else get_model()
+    with _stage('preprocess', source):
+        X_proc = preprocessor.transform(prepare_frame(df, preprocessor))
+    with _stage('predict', source):
+        return model.predict(X_proc)
+
+
+def rule_adjustment(df):
+    """Ajuste manual basado en reglas lógicas, como operaciones de columna."""
+    sleep = df['sleep_hours'].to_numpy(dtype=float)
+    stress = df['stress_level'].to_numpy(dtype=float)
+    screen = df['screen_time_before_sleep'].to_numpy(dtype=float)
+    focus = df['uses_focus_apps'].to_numpy(dtype=float)
+    work = df['work_hours_per_day'].to_numpy(dtype=float)
+
+    adjustment = np.zeros(len(df))
+    adjustment += np.where(sleep >= 8, 0.5, 0.0)
+    adjustment -= np.where(stress >= 8, 0.7, 0.0)
+    adjustment -= np.where(screen >= 3, 0.4, 0.0)
+    adjustment += np.where(focus == 1, 0.3, 0.0)
+    # Ajuste por horas de trabajo
+    adjustment += np.where(work >= 7, 0.4, np.where(work <= 5, -0.5, 0.0))
+    return adjustment
+
+
+def score_parts(df, preprocessor=None, model=None, engine=None, source=None):
+    """Predicción del modelo, ajuste por reglas y puntuación final (limitada a 0-10) de cada fila.
+
+    ``source`` separa las métricas por origen ('api', 'batch', 'sweep'...)
+    para no mezclar latencias de una fila con las de lotes grandes. Los
+    orígenes de ``AUXILIARY_SOURCES`` no cuentan como filas puntuadas.
+    """
+    with _stage('score', source):
+        raw = predict_raw(df, preprocessor, model, engine, source)
+        with _stage('adjust', source):
+            adjustment = rule_adjustment(df)
+            scores = np.clip(raw + adjustment, SCORE_MIN, SCORE_MAX)
+    if source not in AUXILIARY_SOURCES:
+        metrics.add_rows(len(df))
+    return raw, adjustment, scores
+
+
+def score_frame(df, preprocessor=None, model=None, engine=None, source=None):
+    """Puntuación final (modelo + ajuste por reglas) para cada fila de ``df``."""
+    return score_parts(df, preprocessor, model, engine, source)[2]
+
+
+def score_records(records, preprocessor=None, model=None, engine=None, source=None):
+    """Puntúa una lista de registros (dicts con las columnas de user_input())."""
+    df = clamp_frame(pd.DataFrame.from_records(records, columns=FEATURES))
+    return score_frame(df, preprocessor, model, engine, source)
@@ -0,0 +1,111 @@
+"""Explorador de sensibilidad ("¿qué pasaría si...?") vectorizado.
+
+Para el usuario actual se barre cada variable numérica a lo largo del rango
+de su widget. Todos los puntos de todos los barridos forman una sola matriz
+que se puntúa con una única llamada al modelo; las recomendaciones salen de
+las ganancias reales sobre esas curvas, limitadas a cambios accionables.
+"""
+
+import numpy as np
+import pandas as pd
+
+from scoring import FEATURES, FEATURE_LABELS, NUMERIC_RANGES, score_frame
+
+DEFAULT_POINTS = 25
+# Ganancia mínima (en puntos de productividad) para recomendar un cambio.
+MIN_GAIN = 0.05
+
+# Cambios que se pueden recomendar: dirección permitida ('up' solo subir,
+# 'down' solo bajar, 'both') y límites plausibles del valor objetivo. El
+# modelo no es causal y fuera de estos márgenes propone consejos dañinos
+# (p. ej. dormir 2 horas). La satisfacción laboral no es una acción directa
+# y no se recomienda.
+ACTIONABLE = {
+    'sleep_hours': ('up', 7.0, 9.0),
+    'stress_level': ('down', 1.0, 10.0),
+    'days_feeling_burnout_per_month': ('down', 0, 31),
+    'work_hours_per_day': ('down', 6.0, 16.0),
+    'screen_time_before_sleep': ('down', 0.0, 5.0),
+    'number_of_notifications': ('down', 0, 200),
+    'social_media_log': ('down', 0.0, 5.0),
+    'coffee_consumption_per_day': ('down', 0, 10),
+    'breaks_during_work': ('both', 1, 10),
+    'uses_focus_apps': ('up', 0, 1),
+    'has_digital_wellbeing_enabled': ('up', 0, 1),
+}
+
+
+def sweep_values(feature, points=DEFAULT_POINTS):
+    """Valores del barrido de ``feature`` dentro del rango de su widget."""
+    lo, hi = NUMERIC_RANGES[feature]
+    values = np.linspace(lo, hi, points)
+    if isinstance(lo, int):
+        values = np.unique(np.round(values))
+    return values
+
+
+def sweep_frame(record, points=DEFAULT_POINTS):
+    """Matriz con todos los barridos: una fila por punto, el resto de variables fijas."""
+    features, values = [], []
+    for feature in NUMERIC_RANGES:
+        sweep = sweep_values(feature, points)
+        features.extend([feature] * len(sweep))
+        values.append(sweep)
+    values = np.concatenate(values)
+
+    df = pd.DataFrame({col: [record[col]] * len(values) for col in FEATURES})
+    for feature in NUMERIC_RANGES:
+        mask = np.array(features) == feature
+        df.loc[mask, feature] = values[mask]
+    return df, np.array(features), values
+
+
+def sensitivity(record, points=DEFAULT_POINTS, score_fn=None):
+    """Curvas de respuesta {variable: DataFrame(value, score)} con un solo predict."""
+    score_fn = score_fn or (lambda df: score_frame(df, source='sweep'))
+    df, features, values = sweep_frame(record, points)
+    scores = score_fn(df)
+    curves = {}
+    for feature in NUMERIC_RANGES:
+        mask = features == feature
+        curves[feature] = pd.DataFrame({'value': values[mask], 'score': scores[mask]})
+    return curves
+
+
+def recommendations(curves, record, current_score, top=3, min_gain=MIN_GAIN):
+    """Cambios con mayor ganancia marginal, ordenados de mayor a menor.
+
+    Solo se consideran las variables de ``ACTIONABLE`` y, en cada curva, los
+    puntos en la dirección y dentro de los límites permitidos. De ellos se
+    toma el de mejor puntuación y, a igualdad, el más cercano al valor
+    actual (el cambio más pequeño).
+    """
+    recs = []
+    for feature, curve in curves.items():
+        if feature not in ACTIONABLE:
+            continue
+        direction, lo, hi = ACTIONABLE[feature]
+        current = float(record[feature])
+        values = curve['value'].to_numpy()
+        allowed = (values >= lo) & (values <= hi)
+        if direction == 'up':
+            allowed &= values > current
+        elif direction == 'down':
+            allowed &= values < current
+        if not allowed.any():
+            continue
+        values = values[allowed]
+        gains = curve['score'].to_numpy()[allowed] - current_score
+        distance = np.abs(values - current)
+        best = np.lexsort((distance, -np.round(gains, 6)))[0]
+        gain = float(gains[best])
+        if gain >= min_gain:
+            recs.append({
+                'feature': feature,
+                'label': FEATURE_LABELS[feature],
+                'current': current,
+                'target': float(values[best]),
+                'gain': gain,
+            })
+    recs.sort(key=lambda r: r['gain'], reverse=True)
+    return recs[:top]
@@ -0,0 +1,122 @@
+"""Perfil de arranque en frío: tiempo de import por módulo y de carga por artefacto.
+
+Cada medida se toma en un intérprete nuevo, para que no influyan los módulos
+ya importados en el proceso actual. Los imports se miden con
+``python -X importtime`` (tiempo acumulado de cada módulo de primer nivel).
+
+Uso:
+    python startup_profile.py
+    python startup_profile.py --json
+
+En la app, STARTUP_PROFILE=1 añade este perfil al panel 'Avanzado'.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Módulos del camino de arranque de la app, en el orden en que se importan.
+APP_MODULES = [
+    'numpy', 'pandas', 'streamlit',
+    'artifacts', 'scoring', 'compiled', 'attribution', 'prediction_cache', 'sensitivity',
+]
+# Módulos pesados que el arranque con el motor 'compiled' ya no necesita.
+OPTIONAL_MODULES = ['joblib', 'sklearn', 'matplotlib']
+
+ARTIFACTS = ['compiled', 'preprocessor', 'model']
+
+
+def _run(code, importtime=False):
+    cmd = [sys.executable, '-W', 'ignore']
+    if importtime:
+        cmd += ['-X', 'importtime']
+    result = subprocess.run(cmd + ['-c', code], cwd=BASE_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "error desconocido")
+    return result
+
+
+def profile_imports(modules=APP_MODULES):
+    """Segundos de import (acumulados) de cada módulo, importados en orden en un proceso nuevo.
+
+    Un módulo que ya importó otro anterior solo suma lo que le falta, como en la app.
+    """
+    code = "\n".join(f"import {m}" for m in modules)
+    stderr = _run(code, importtime=True).stderr
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Solo los módulos de primer nivel (sin sangría) y los pedidos.
+        if not name.startswith('  ') and name.strip() in modules:
+            times[name.strip()] = int(cumulative) / 1e6
+    return {m: times.get(m, 0.0) for m in modules}
+
+
+def profile_optional_imports(modules=OPTIONAL_MODULES):
+    """Segundos de import de cada módulo pesado por separado (None si no está instalado)."""
+    times = {}
+    for m in modules:
+        try:
+            times[m] = profile_imports([m])[m]
+        except RuntimeError:
+            times[m] = None
+    return times
+
+
+def profile_artifacts(names=ARTIFACTS):
+    """Segundos de carga de cada artefacto en un proceso nuevo, incluidos los imports que arrastra."""
+    times = {}
+    for name in names:
+        code = (
+            "import time\n"
+            "from artifacts import registry\n"
+            "start = time.perf_counter()\n"
+            f"registry.get({name!r})\n"
+            "print(time.perf_counter() - start)\n"
+        )
+        try:
+            times[name] = float(_run(code).stdout.strip().splitlines()[-1])
+        except RuntimeError:
+            times[name] = None
+    return times
+
+
+def startup_profile():
+    return {
+        'imports': profile_imports(),
+        'optional_imports': profile_optional_imports(),
+        'artifacts': profile_artifacts(),
+    }
+
+
+def _format(profile):
+    lines = ["Imports del arranque de la app (acumulado, en orden):"]
+    for m, t in profile['imports'].items():
+        lines.append(f"  {m:<20} {t * 1000:8.1f} ms")
+    lines.append(f"  {'total':<20} {sum(profile['imports'].values()) * 1000:8.1f} ms")
+    lines.append("Módulos pesados opcionales (import aislado):")
+    for m, t in profile['optional_imports'].items():
+        lines.append(f"  {m:<20} {'no instalado' if t is None else f'{t * 1000:8.1f} ms'}")
+    lines.append("Carga de artefactos (proceso nuevo):")
+    for name, t in profile['artifacts'].items():
+        lines.append(f"  {name:<20} {'no disponible' if t is None else f'{t * 1000:8.1f} ms'}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perfil de arranque en frío")
+    parser.add_argument('--json', action='store_true', help="Salida en JSON")
+    args = parser.parse_args(argv)
+
+    profile = startup_profile()
+    print(json.dumps(profile, indent=2) if args.json else _format(profile))
+
+
+if __name__ == '__main__':
+    main()